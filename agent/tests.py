@@ -1,3 +1,309 @@
-from django.test import TestCase
+import itertools
+import time
+import uuid
+from unittest import mock
 
-# Create your tests here.
+import httpx
+import orjson
+from django.test import AsyncClient, SimpleTestCase, override_settings
+
+from . import views
+from .views import _USERNAME_RE, render_status_update, render_task_response
+
+
+class UsernameRegexTests(SimpleTestCase):
+
+    def match(self, text):
+        m = _USERNAME_RE.match(text)
+        return m.group('u') if m else None
+
+    def test_bare_login(self):
+        self.assertEqual(self.match("torvalds"), "torvalds")
+        self.assertEqual(self.match("  @Torvalds "), "Torvalds")
+
+    def test_agent_mentions_are_stripped(self):
+        self.assertEqual(self.match("@devanalyst torvalds"), "torvalds")
+        self.assertEqual(self.match("@gbollybambam torvalds"), "torvalds")
+        self.assertEqual(self.match("@gbollybambam hi"), "hi")
+        self.assertEqual(self.match("gbollybambam x"), "x")
+
+    def test_lone_mention_is_not_a_login(self):
+        self.assertIsNone(self.match("@devanalyst"))
+        self.assertIsNone(self.match("@gbollybambam"))
+
+    def test_login_length_limit(self):
+        self.assertEqual(self.match("a" * 39), "a" * 39)
+        self.assertIsNone(self.match("a" * 40))
+
+    def test_hyphen_rules(self):
+        self.assertEqual(self.match("linus-t"), "linus-t")
+        for text in ("-", "--", "-foo-", "foo-", "foo--bar"):
+            self.assertIsNone(self.match(text), text)
+            self.assertIsNone(views._GITHUB_LOGIN_RE.fullmatch(text), text)
+
+    def test_free_form_text_does_not_match(self):
+        self.assertIsNone(self.match("please analyze torvalds"))
+        self.assertIsNone(self.match("-torvalds"))
+        self.assertIsNone(self.match(""))
+
+
+class EnvelopeRenderingTests(SimpleTestCase):
+    """The byte templates must render exactly what orjson.dumps would for the equivalent dict."""
+
+    TEXT = 'Analysis with {TASK_ID} and {GH_DATA} inside, "quotes", \\ and ünïcode\n'
+    GITHUB_DATA = [{"name": "{ART_ID}", "stars": 3, "description": "{ANALYSIS}", "is_fork": False}]
+
+    def message(self, text):
+        return {
+            "kind": "message", "role": "agent", "parts": [{"kind": "text", "text": text}],
+            "messageId": "m1", "taskId": "t1"
+        }
+
+    def test_task_response_matches_dict(self):
+        artifact_id = uuid.UUID(int=1)
+        for rpc_id in (7, "rpc-{RPC_ID}", None):
+            expected = {
+                "jsonrpc": "2.0", "id": rpc_id,
+                "result": {
+                    "id": "t1", "contextId": "c1",
+                    "status": {"state": "completed", "timestamp": "ts", "message": self.message(self.TEXT)},
+                    "artifacts": [{"artifactId": artifact_id.hex, "name": "github_raw_data",
+                                   "parts": [{"kind": "data", "data": self.GITHUB_DATA}]}],
+                    "history": [], "kind": "task"
+                }
+            }
+            with mock.patch("agent.views.uuid.uuid4", return_value=artifact_id):
+                rendered = render_task_response(rpc_id, "t1", "c1", self.TEXT, self.GITHUB_DATA, "m1", "ts")
+            self.assertEqual(rendered, orjson.dumps(expected))
+
+    def test_status_update_matches_dict(self):
+        expected = {
+            "jsonrpc": "2.0", "id": 7,
+            "result": {
+                "taskId": "t1", "contextId": "c1", "kind": "status-update",
+                "status": {"state": "working", "timestamp": "ts", "message": self.message(self.TEXT)},
+                "final": False
+            }
+        }
+        rendered = render_status_update(7, "t1", "c1", self.TEXT, "m1", "ts")
+        self.assertEqual(rendered, orjson.dumps(expected))
+
+
+class MockTransportTestCase(SimpleTestCase):
+    """Routes the shared client through httpx.MockTransport and isolates token and cache state."""
+
+    tokens = []
+
+    def setUp(self):
+        self.requests = []
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self._handle))
+        for name, value in (
+            ("_CLIENT", client),
+            ("GITHUB_TOKENS", list(self.tokens)),
+            ("_TOKEN_IDX", itertools.cycle(self.tokens)),
+            ("_TOKEN_RESET_AT", {}),
+            ("_GH_CACHE", views.TTLCache(maxsize=16, ttl=86400)),
+            ("_LLM_CACHE", views.TTLCache(maxsize=16, ttl=3600)),
+            ("_EXTRACT_CACHE", views.TTLCache(maxsize=16, ttl=3600)),
+            ("_CACHE_STATS", dict.fromkeys(views._CACHE_STATS, 0)),
+            ("_start_warm_up", mock.Mock()),
+        ):
+            patcher = mock.patch.object(views, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _handle(self, request):
+        self.requests.append(request)
+        return self.handle(request)
+
+    def handle(self, request):
+        raise AssertionError(f"Unexpected request: {request.method} {request.url}")
+
+    def token_of(self, request):
+        return request.headers.get("Authorization", "").removeprefix("Bearer ") or None
+
+
+GRAPHQL_OK = {"data": {"repositoryOwner": {"repositories": {"nodes": [
+    {"name": "linux", "stars": 1, "forks": 2, "primaryLanguage": {"name": "C"}, "description": None, "is_fork": False}
+]}}}}
+REST_REPOS = [{"name": "linux", "stargazers_count": 1, "forks_count": 2, "language": "C", "description": None, "fork": False}]
+REPOS = [{"name": "linux", "stars": 1, "forks": 2, "language": "C", "description": "", "is_fork": False}]
+EXHAUSTED = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(int(time.time()) + 3600)}
+
+
+class TokenRotationTests(MockTransportTestCase):
+
+    tokens = ["a", "b"]
+    graphql = {}
+
+    def handle(self, request):
+        if request.url.host == "api.github.com" and request.url.path == "/graphql":
+            return self.graphql[self.token_of(request)]()
+        if request.url.path == "/users/torvalds/repos":
+            return httpx.Response(200, json=REST_REPOS, headers={"ETag": '"rest"'})
+        return super().handle(request)
+
+    def tried(self):
+        return [(request.url.path, self.token_of(request)) for request in self.requests]
+
+    async def test_rejected_token_is_evicted_and_next_used(self):
+        self.graphql = {"a": lambda: httpx.Response(401), "b": lambda: httpx.Response(200, json=GRAPHQL_OK)}
+        self.assertEqual(await views.get_github_data("torvalds"), REPOS)
+        self.assertEqual(self.tried(), [("/graphql", "a"), ("/graphql", "b")])
+        self.assertEqual(views._TOKEN_RESET_AT["a"], float("inf"))
+
+    async def test_exhausted_token_is_evicted_and_next_used(self):
+        self.graphql = {
+            "a": lambda: httpx.Response(200, headers=EXHAUSTED, json={
+                "data": {"repositoryOwner": None}, "errors": [{"type": "RATE_LIMITED", "message": "API rate limit exceeded"}]
+            }),
+            "b": lambda: httpx.Response(200, json=GRAPHQL_OK),
+        }
+        self.assertEqual(await views.get_github_data("torvalds"), REPOS)
+        self.assertEqual(self.tried(), [("/graphql", "a"), ("/graphql", "b")])
+        self.assertEqual(views._TOKEN_RESET_AT["a"], int(EXHAUSTED["X-RateLimit-Reset"]))
+
+    async def test_forbidden_rate_limit_is_evicted_and_next_used(self):
+        self.graphql = {
+            "a": lambda: httpx.Response(403, headers={"Retry-After": "30"}),
+            "b": lambda: httpx.Response(200, json=GRAPHQL_OK),
+        }
+        self.assertEqual(await views.get_github_data("torvalds"), REPOS)
+        self.assertEqual(self.tried(), [("/graphql", "a"), ("/graphql", "b")])
+        self.assertGreater(views._TOKEN_RESET_AT["a"], time.time())
+
+    async def test_all_tokens_exhausted_falls_back_to_rest(self):
+        self.graphql = {
+            "a": lambda: httpx.Response(429),
+            "b": lambda: httpx.Response(403, headers=EXHAUSTED),
+        }
+        self.assertEqual(await views.get_github_data("torvalds"), REPOS)
+        self.assertEqual(self.tried(), [("/graphql", "a"), ("/graphql", "b"), ("/users/torvalds/repos", None)])
+
+        # Evicted tokens are skipped on the next request instead of being retried.
+        views._GH_CACHE.clear()
+        self.requests.clear()
+        await views.get_github_data("torvalds")
+        self.assertEqual(self.tried(), [("/users/torvalds/repos", None)])
+
+
+class GitHubCacheTests(MockTransportTestCase):
+
+    def handle(self, request):
+        if request.url.path == "/users/torvalds/repos":
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304, headers={"ETag": '"v1"'})
+            return httpx.Response(200, json=REST_REPOS, headers={"ETag": '"v1"'})
+        return super().handle(request)
+
+    async def test_fresh_entry_is_served_without_a_request(self):
+        self.assertEqual(await views.get_github_data("torvalds"), REPOS)
+        self.assertEqual(await views.get_github_data("Torvalds"), REPOS)
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(views._CACHE_STATS["github_misses"], 1)
+        self.assertEqual(views._CACHE_STATS["github_hits"], 1)
+
+    async def test_stale_entry_is_revalidated_with_etag(self):
+        self.assertEqual(await views.get_github_data("torvalds"), REPOS)
+        with mock.patch.object(views, "_GH_FRESH_SECONDS", 0):
+            self.assertEqual(await views.get_github_data("torvalds"), REPOS)
+        self.assertEqual(self.requests[1].headers["If-None-Match"], '"v1"')
+        self.assertEqual(views._CACHE_STATS["github_misses"], 2)
+        self.assertEqual(views._CACHE_STATS["github_not_modified"], 1)
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class MessageStreamTests(MockTransportTestCase):
+
+    def handle(self, request):
+        if request.url.path == "/users/torvalds/repos":
+            return httpx.Response(200, json=REST_REPOS)
+        if request.url.host == "gemini.test" and "stream" in request.url.path:
+            chunks = ("Senior ", "engineer")
+            sse = "".join(
+                "data: " + orjson.dumps({"candidates": [{"content": {"parts": [{"text": text}]}}]}).decode() + "\r\n\r\n"
+                for text in chunks
+            )
+            return httpx.Response(200, text=sse, headers={"Content-Type": "text/event-stream"})
+        if request.url.host == "gemini.test" or request.url.host == "generativelanguage.googleapis.com":
+            return httpx.Response(404)
+        return super().handle(request)
+
+    async def post_stream(self, text):
+        body = {
+            "jsonrpc": "2.0", "id": 1, "method": "message/stream",
+            "params": {"message": {"taskId": "t1", "parts": [{"kind": "text", "text": text}]}}
+        }
+        with mock.patch.multiple(views, GEMINI_API_URL="https://gemini.test/generate",
+                                 GEMINI_STREAM_URL="https://gemini.test/stream"):
+            response = await AsyncClient().post("/api/dev-analyst/", orjson.dumps(body), content_type="application/json")
+            self.assertEqual(response["Content-Type"], "application/x-ndjson")
+            content = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertTrue(content.endswith(b"\n"))
+        return [orjson.loads(line) for line in content.splitlines()]
+
+    async def test_analysis_streams_status_updates_then_task(self):
+        frames = await self.post_stream("torvalds")
+
+        *updates, task = frames
+        self.assertEqual([frame["result"]["status"]["message"]["parts"][0]["text"] for frame in updates],
+                         ["Senior ", "engineer"])
+        for frame in updates:
+            self.assertEqual(frame["result"]["kind"], "status-update")
+            self.assertEqual(frame["result"]["status"]["state"], "working")
+            self.assertIs(frame["result"]["final"], False)
+        self.assertEqual(task["result"]["kind"], "task")
+        self.assertEqual(task["result"]["status"]["state"], "completed")
+        self.assertEqual(task["result"]["status"]["message"]["parts"][0]["text"], "Senior engineer")
+        self.assertEqual(task["result"]["artifacts"][0]["parts"][0]["data"], REPOS)
+        self.assertEqual(len({frame["result"]["status"]["message"]["messageId"] for frame in frames}), 1)
+        self.assertEqual({frame["id"] for frame in frames}, {1})
+
+    async def test_greeting_gets_a_single_task_frame(self):
+        frames = await self.post_stream("hi")
+        self.assertEqual(len(frames), 1)
+        self.assertEqual(frames[0]["result"]["kind"], "task")
+        self.assertEqual(frames[0]["result"]["id"], "t1")
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class DevAnalystViewTests(MockTransportTestCase):
+
+    extracted = "-"
+
+    def handle(self, request):
+        if request.url.host == "gemini.test":
+            return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": self.extracted}]}}]})
+        return super().handle(request)
+
+    async def post(self, text):
+        body = {"jsonrpc": "2.0", "id": 1, "method": "message/send",
+                "params": {"message": {"parts": [{"kind": "text", "text": text}]}}}
+        with mock.patch.object(views, "GEMINI_API_URL", "https://gemini.test/generate"):
+            response = await AsyncClient().post("/api/dev-analyst/", orjson.dumps(body), content_type="application/json")
+        return orjson.loads(response.content)
+
+    async def test_invalid_extracted_login_makes_no_lookup(self):
+        for extracted in ("-", "--", "-foo-", "foo-"):
+            with self.subTest(extracted=extracted):
+                self.extracted = extracted
+                views._EXTRACT_CACHE.clear()
+                result = (await self.post("please analyze the user called dash"))["result"]
+                self.assertEqual(result["status"]["message"]["parts"][0]["text"], views.INVALID_USERNAME_TEXT)
+                self.assertEqual(result["artifacts"][0]["parts"][0]["data"], {})
+        self.assertEqual({request.url.host for request in self.requests}, {"gemini.test"})
+
+    async def test_github_is_warmed_only_on_extraction_miss(self):
+        self.extracted = "torvalds"
+        with mock.patch.object(views, "get_github_data", mock.AsyncMock(return_value={})), \
+                mock.patch.object(views, "get_gemini_analysis", mock.AsyncMock(return_value="ok")):
+            await self.post("please analyze torvalds")
+            await self.post("please analyze torvalds")
+        views._start_warm_up.assert_called_once_with(views.GITHUB_WARMUP_URL)
+
+    async def test_gemini_is_warmed_only_on_github_miss(self):
+        with mock.patch.object(views, "get_gemini_analysis", mock.AsyncMock(return_value="ok")), \
+                mock.patch.object(views, "_fetch_repos_rest", mock.AsyncMock(return_value=(None, REPOS))):
+            await self.post("torvalds")
+            await self.post("@gbollybambam torvalds")
+        views._start_warm_up.assert_called_once_with(views.GEMINI_WARMUP_URL)
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import DevAnalystView
+from .views import DevAnalystView, MetricsView
 
 urlpatterns = [
     path('api/dev-analyst/', DevAnalystView.as_view(), name='dev_analyst_api'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
@@ -1,10 +1,19 @@
-import json
+import asyncio
+import itertools
 import os
+import re
+import threading
+import time
 import uuid
 from datetime import datetime, timezone
-import requests 
-
-from django.http import JsonResponse, HttpRequest
+from functools import lru_cache
+from hashlib import sha256
+from threading import Lock, RLock
+import httpx
+import orjson
+from cachetools import TTLCache
+
+from django.http import HttpResponse, HttpRequest, StreamingHttpResponse
 from django.views import View
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
@@ -12,7 +21,105 @@ from dotenv import load_dotenv
 
 load_dotenv()
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+GEMINI_MODEL = "gemini-2.5-flash"
+GEMINI_HEADERS = {"Content-Type": "application/json"}
+# Output caps: generation time grows with every token, and the answer format is short.
+ANALYSIS_MAX_OUTPUT_TOKENS = 450
+EXTRACTION_MAX_OUTPUT_TOKENS = 32
+GEMINI_API_URL = None
+GEMINI_STREAM_URL = None
+# v1beta: generationConfig.thinkingConfig is only accepted there.
+if GEMINI_API_KEY:
+    GEMINI_API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent?key={GEMINI_API_KEY}"
+    GEMINI_STREAM_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:streamGenerateContent?alt=sse&key={GEMINI_API_KEY}"
+GEMINI_WARMUP_URL = "https://generativelanguage.googleapis.com/"  # no key: only opens the connection
+
+# Comma-separated pool of tokens, rotated per request; a single GITHUB_TOKEN still works.
+GITHUB_TOKENS = [
+    token.strip()
+    for token in os.environ.get("GITHUB_TOKENS", os.environ.get("GITHUB_TOKEN", "")).split(",")
+    if token.strip()
+]
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+GITHUB_WARMUP_URL = "https://api.github.com/rate_limit"  # does not count against the rate limit
+
+# GraphQL lets us ask for only the fields the prompt uses; the aliases match the REST-derived keys.
+# Mirrors the REST /users/{u}/repos listing: public repos only (the token's owner may see private ones),
+# users and organisations alike (repositoryOwner), ordered by name like REST's default full_name sort.
+GITHUB_REPOS_QUERY = """
+query($u: String!) {
+  repositoryOwner(login: $u) {
+    repositories(first: 10, privacy: PUBLIC, ownerAffiliations: OWNER, orderBy: {field: NAME, direction: ASC}) {
+      nodes { name stars: stargazerCount forks: forkCount primaryLanguage { name } description is_fork: isFork }
+    }
+  }
+}
+"""
 
+# One pooled HTTP/2 client per worker so GitHub and Gemini calls reuse their TCP/TLS connections.
+# httpx pools are bound to the event loop that opened them, and under WSGI asgiref runs every request
+# on a fresh, short-lived loop. So the client lives on a dedicated I/O loop thread for the life of the
+# worker, and request code (on whatever loop it runs) hands its HTTP calls to that loop.
+_IO_LOOP = None
+_IO_LOOP_LOCK = Lock()
+_CLIENT = None
+_RETRY_STATUSES = {502, 503, 504}
+_RETRY_METHODS = {"GET", "HEAD"}
+_MAX_RETRIES = 2
+_BACKOFF_FACTOR = 0.2
+# Keep up to 64 idle connections for 60s so bursts reuse warm TLS sessions; beyond that, open extra
+# connections rather than queueing (no hard cap). Short connect/read timeouts stop a stuck socket
+# from pinning a pooled connection.
+_POOL_LIMITS = httpx.Limits(max_connections=None, max_keepalive_connections=64, keepalive_expiry=60.0)
+_TIMEOUT = httpx.Timeout(15.0, connect=3.05)
+
+# Per-worker caches: repo lists change slowly and analyses are deterministic (temperature 0).
+# GitHub entries are (etag, simplified_repos, fetched_at); they are served as-is while fresh and
+# revalidated with If-None-Match afterwards, so they outlive the freshness window.
+_GH_FRESH_SECONDS = 600
+_GH_CACHE = TTLCache(maxsize=512, ttl=86400)
+_LLM_CACHE = TTLCache(maxsize=512, ttl=3600)
+# Raw request text -> extracted username, keyed on the normalized text so typing variants share an entry.
+_EXTRACT_CACHE = TTLCache(maxsize=1024, ttl=3600)
+_CACHE_LOCK = RLock()
+_CACHE_STATS = {
+    "extract_hits": 0, "extract_misses": 0,
+    "github_hits": 0, "github_misses": 0, "github_not_modified": 0,
+    "llm_hits": 0, "llm_misses": 0
+}
+
+# GitHub logins: 1-39 alphanumerics or single hyphens, not starting or ending with a hyphen.
+_GITHUB_LOGIN = r'[A-Za-z0-9](?:[A-Za-z0-9]|-(?=[A-Za-z0-9])){0,38}'
+
+# Bare-login input ("torvalds", "@torvalds", "@devanalyst torvalds", "@gbollybambam torvalds") parsed and
+# validated in one pass, so only free-form text needs the Gemini extraction call. A lone agent mention
+# ("@devanalyst", "@gbollybambam") is not a login.
+_USERNAME_RE = re.compile(
+    r'^\s*(?!@?devanalyst\s*$|@gbollybambam\s*$)(?:@?(?:devanalyst|gbollybambam)\s+)?@?'
+    r'(?P<u>' + _GITHUB_LOGIN + r')\s*$',
+    re.I
+)
+# Leading agent mention on free-form input; stripped before it is sent to Gemini.
+_MENTION_PREFIX_RE = re.compile(r'^@?(?:gbollybambam|devanalyst)\s+', re.I)
+# Profile-URL and mention noise around a login: "https://github.com/Torvalds/", "@torvalds".
+_USERNAME_NOISE_RE = re.compile(r'^(?:https?://)?(?:www\.)?(?:github\.com/)?@?', re.I)
+
+# Extracted usernames that aren't valid logins are rejected before any outbound call.
+_GITHUB_LOGIN_RE = re.compile(_GITHUB_LOGIN)
+# Upper bound on user text forwarded into the extraction prompt, so oversized input can't inflate token cost.
+MAX_INPUT_CHARS = 500
+INVALID_USERNAME_TEXT = "**Error:** Invalid request. Please provide a single, clean GitHub username."
+
+# Descriptions past this length add prompt tokens but little signal.
+MAX_DESCRIPTION_CHARS = 160
+
+# Token rotation state; exhausted tokens are skipped until their X-RateLimit-Reset epoch,
+# rejected (401) tokens for the life of the worker.
+_TOKEN_IDX = itertools.cycle(GITHUB_TOKENS)
+_TOKEN_RESET_AT = {}
+_TOKEN_LOCK = Lock()
+# Eviction for a rate-limited token when GitHub sends neither X-RateLimit-Reset nor Retry-After.
+_RATE_LIMIT_BACKOFF_SECONDS = 60
 
 
 EXTRACTION_PROMPT = """
@@ -47,35 +154,142 @@ Analyze: {username}
 **Recommendation:** [A 1-sentence hiring recommendation.]
 """
 
+# Split the templates once at import so building a prompt is a join instead of a .format() parse.
+_EXTRACTION_PREFIX, _EXTRACTION_SUFFIX = EXTRACTION_PROMPT.split("{raw_input}")
+_PROMPT_PREFIX, _PROMPT_REST = GEMINI_PROMPT_TEMPLATE.split("{github_data}")
+_PROMPT_USERNAME_SEGMENTS = _PROMPT_REST.split("{username}")
+
+
+def _get_io_loop() -> asyncio.AbstractEventLoop:
+    """Returns the worker's I/O loop, starting its daemon thread on first use."""
+    global _IO_LOOP
+    with _IO_LOOP_LOCK:
+        if _IO_LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="dev-analyst-io", daemon=True).start()
+            _IO_LOOP = loop
+    return _IO_LOOP
+
+def _get_client() -> httpx.AsyncClient:
+    """Returns the shared AsyncClient. Only call this from coroutines running on the I/O loop."""
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                limits=_POOL_LIMITS,
+                retries=_MAX_RETRIES
+            ),
+            timeout=_TIMEOUT
+        )
+    return _CLIENT
+
+async def _on_io_loop(coro):
+    """Runs coro on the I/O loop and awaits its result from the caller's loop."""
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, _get_io_loop()))
+
+async def _request_on_io_loop(method: str, url: str, **kwargs) -> httpx.Response:
+    client = _get_client()
+    for attempt in range(_MAX_RETRIES + 1):
+        response = await client.request(method, url, **kwargs)
+        if response.status_code not in _RETRY_STATUSES or method not in _RETRY_METHODS or attempt == _MAX_RETRIES:
+            return response
+        await asyncio.sleep(_BACKOFF_FACTOR * (2 ** attempt))
+
+async def _send(method: str, url: str, **kwargs) -> httpx.Response:
+    """Sends a request on the shared client, retrying idempotent calls on 502/503/504."""
+    return await _on_io_loop(_request_on_io_loop(method, url, **kwargs))
+
+async def _stream_lines(method: str, url: str, **kwargs):
+    """Yields the response lines of a request streamed on the shared client.
+
+    The response is read on the I/O loop and each line is handed to the caller's loop through a queue.
+    Raises httpx.HTTPStatusError (with the body read) for error statuses.
+    """
+    caller_loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def emit(kind, value=None):
+        caller_loop.call_soon_threadsafe(queue.put_nowait, (kind, value))
+
+    async def pump():
+        try:
+            async with _get_client().stream(method, url, **kwargs) as response:
+                if response.is_error:
+                    await response.aread()
+                    response.raise_for_status()
+                async for line in response.aiter_lines():
+                    emit("line", line)
+        except Exception as e:
+            emit("error", e)
+        finally:
+            emit("done")
 
-def gemini_call(prompt_text: str) -> str:
+    future = asyncio.run_coroutine_threadsafe(pump(), _get_io_loop())
+    try:
+        while True:
+            kind, value = await queue.get()
+            if kind == "done":
+                return
+            if kind == "error":
+                raise value
+            yield value
+    finally:
+        future.cancel()
+
+async def _warm_connection(url: str) -> None:
+    """Opens (or keeps alive) a pooled connection to the host so the next real call skips the handshake."""
+    try:
+        await _request_on_io_loop("HEAD", url)
+    except httpx.HTTPError as e:
+        print(f"Connection warm-up to {url} failed: {e}")
+
+def _start_warm_up(url: str) -> None:
+    """Schedules a connection warm-up on the I/O loop without waiting for it.
+
+    The request never blocks on the HEAD (or its connect timeout), and the warm-up outlives the request's loop.
+    """
+    asyncio.run_coroutine_threadsafe(_warm_connection(url), _get_io_loop())
+
+GEMINI_GENERATION_CONFIG = {
+    "temperature": 0.0,
+    "topP": 0.9,
+    "candidateCount": 1,
+    # Thinking tokens count against maxOutputTokens; these prompts don't need them.
+    "thinkingConfig": {"thinkingBudget": 0}
+}
+_GEMINI_BODY_PREFIX = b'{"contents":[{"parts":[{"text":'
+
+@lru_cache(maxsize=None)
+def _gemini_body_suffix(max_output_tokens: int) -> bytes:
+    generation_config = dict(GEMINI_GENERATION_CONFIG, maxOutputTokens=max_output_tokens)
+    return b'}]}],"generationConfig":' + orjson.dumps(generation_config) + b"}"
+
+def _gemini_body(prompt_text: str, max_output_tokens: int) -> bytes:
+    """Encodes the request body shared by the buffered and streaming Gemini calls; only the prompt varies."""
+    return b"".join((_GEMINI_BODY_PREFIX, orjson.dumps(prompt_text), _gemini_body_suffix(max_output_tokens)))
+
+async def gemini_call(prompt_text: str, max_output_tokens: int = ANALYSIS_MAX_OUTPUT_TOKENS) -> str:
     """Helper function to execute any Gemini API call."""
-    if not GEMINI_API_KEY:
+    if not GEMINI_API_URL:
         return "Error: GEMINI_API_KEY is not set."
-        
-    api_url = f"https://generativelanguage.googleapis.com/v1/models/gemini-2.5-flash:generateContent?key={GEMINI_API_KEY}"
     
-    payload = {
-        "contents": [
-            {"parts": [{"text": prompt_text}]}
-        ],
-        "generationConfig": {
-            "temperature": 0.0
-        }
-    }
-    headers = {"Content-Type": "application/json"}
+    body = _gemini_body(prompt_text, max_output_tokens)
 
     try:
-        response = requests.post(api_url, headers=headers, data=json.dumps(payload))
+        response = await _send("POST", GEMINI_API_URL, headers=GEMINI_HEADERS, content=body)
         response.raise_for_status()
-        response_json = response.json()
+        response_json = orjson.loads(response.content)
         
         text = response_json['candidates'][0]['content']['parts'][0]['text'].strip()
         return text
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPStatusError as e:
         print(f"---! ERROR calling Gemini (HTTP) !---: {e}")
         return f"Error: The Gemini API failed during extraction/analysis. Details: {e.response.text}"
+    except httpx.RequestError as e:
+        print(f"---! ERROR calling Gemini (HTTP) !---: {e}")
+        return f"Error: The Gemini API failed during extraction/analysis. Details: {e}"
     except (KeyError, IndexError) as e:
         print(f"---! ERROR parsing Gemini response !---: {e}")
         return "Error: The Gemini API returned an unexpected format."
@@ -83,76 +297,398 @@ def gemini_call(prompt_text: str) -> str:
         print(f"---! UNKNOWN ERROR in gemini_call !---: {e}")
         return f"Error: An unknown Gemini error occurred: {str(e)}"
 
-def extract_username_from_input(full_input: str) -> str:
+async def gemini_stream(prompt_text: str, max_output_tokens: int = ANALYSIS_MAX_OUTPUT_TOKENS):
+    """Yields the text chunks of a Gemini answer as they are generated."""
+    if not GEMINI_STREAM_URL:
+        yield "Error: GEMINI_API_KEY is not set."
+        return
+
+    body = _gemini_body(prompt_text, max_output_tokens)
+
+    try:
+        async for line in _stream_lines("POST", GEMINI_STREAM_URL, headers=GEMINI_HEADERS, content=body):
+            if not line.startswith("data:"):
+                continue
+            chunk = orjson.loads(line[len("data:"):])
+            for candidate in chunk.get("candidates", [])[:1]:
+                for part in candidate.get("content", {}).get("parts", []):
+                    if part.get("text"):
+                        yield part["text"]
+
+    except httpx.HTTPStatusError as e:
+        print(f"---! ERROR streaming Gemini (HTTP) !---: {e}")
+        yield f"Error: The Gemini API failed during analysis. Details: {e.response.text}"
+    except httpx.RequestError as e:
+        print(f"---! ERROR streaming Gemini (HTTP) !---: {e}")
+        yield f"Error: The Gemini API failed during analysis. Details: {e}"
+    except Exception as e:
+        print(f"---! UNKNOWN ERROR in gemini_stream !---: {e}")
+        yield f"Error: An unknown Gemini error occurred: {str(e)}"
+
+def normalize_username(text: str) -> str:
+    """Canonical cache-key form: 'Torvalds', ' @torvalds ' and 'github.com/torvalds/' all become 'torvalds'."""
+    text = " ".join(text.split()).lower()
+    return _USERNAME_NOISE_RE.sub("", text, count=1).rstrip("/")
+
+def _is_extraction_cached(full_input: str) -> bool:
+    with _CACHE_LOCK:
+        return normalize_username(full_input) in _EXTRACT_CACHE
+
+async def extract_username_from_input(full_input: str) -> str:
     """Uses Gemini to extract the clean username from messy input."""
-    prompt = EXTRACTION_PROMPT.format(raw_input=full_input)
-    result = gemini_call(prompt)
+    cache_key = normalize_username(full_input)
+    with _CACHE_LOCK:
+        cached = _EXTRACT_CACHE.get(cache_key)
+        if cached is not None:
+            _CACHE_STATS["extract_hits"] += 1
+            return cached
+        _CACHE_STATS["extract_misses"] += 1
+
+    prompt = "".join((_EXTRACTION_PREFIX, full_input, _EXTRACTION_SUFFIX))
+    result = await gemini_call(prompt, max_output_tokens=EXTRACTION_MAX_OUTPUT_TOKENS)
     
-    return result.strip().lower()
-
-def get_github_data(username: str) -> dict:
-    """Fetches public repository data for a given GitHub username (limited to 10 for speed)."""
+    clean_username = result.strip().lower()
+    if not clean_username.startswith("error:"):
+        with _CACHE_LOCK:
+            _EXTRACT_CACHE[cache_key] = clean_username
+    return clean_username
+
+def _acquire_github_token():
+    """Returns the next token with rate-limit budget left, or None if every token is exhausted."""
+    with _TOKEN_LOCK:
+        now = time.time()
+        for _ in range(len(GITHUB_TOKENS)):
+            token = next(_TOKEN_IDX)
+            if _TOKEN_RESET_AT.get(token, 0) <= now:
+                _TOKEN_RESET_AT.pop(token, None)
+                return token
+        return None
+
+def _record_rate_limit(token: str, headers) -> bool:
+    """Evicts a token from rotation until its reset time once GitHub reports it exhausted.
+
+    Returns True if the token was evicted.
+    """
+    remaining = headers.get("X-RateLimit-Remaining")
+    reset = headers.get("X-RateLimit-Reset")
+    if remaining is None or reset is None:
+        return False
+    try:
+        if int(remaining) <= 0:
+            with _TOKEN_LOCK:
+                _TOKEN_RESET_AT[token] = int(reset)
+            return True
+    except ValueError:
+        pass
+    return False
+
+def _is_rate_limited(response: httpx.Response, body: dict = None) -> bool:
+    """True for primary/secondary rate-limit statuses and GraphQL's 200 + RATE_LIMITED error body."""
+    if response.status_code == 429:
+        return True
+    if response.status_code == 403:
+        return response.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in response.headers
+    return any(error.get("type") == "RATE_LIMITED" for error in (body or {}).get("errors") or [])
+
+def _evict_rate_limited_token(token: str, headers) -> None:
+    """Evicts a rate-limited token until X-RateLimit-Reset, else for Retry-After (default 60s)."""
+    if _record_rate_limit(token, headers):
+        return
+    try:
+        retry_after = int(headers.get("Retry-After", _RATE_LIMIT_BACKOFF_SECONDS))
+    except ValueError:
+        retry_after = _RATE_LIMIT_BACKOFF_SECONDS
+    with _TOKEN_LOCK:
+        _TOKEN_RESET_AT[token] = time.time() + retry_after
+
+def _revoke_github_token(token: str) -> None:
+    """Drops a token GitHub rejected (revoked, expired or malformed) from rotation for good."""
+    print("GitHub rejected a token (401); removing it from rotation.")
+    with _TOKEN_LOCK:
+        _TOKEN_RESET_AT[token] = float("inf")
+
+async def _fetch_repos_graphql(username: str, token: str):
+    """Fetches exactly the fields we use in one GraphQL round-trip (requires a token).
+
+    Returns None if GitHub rejects the token or it is out of rate limit, after evicting it,
+    so the caller can try another.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    payload = {"query": GITHUB_REPOS_QUERY, "variables": {"u": username}}
+    response = await _send("POST", GITHUB_GRAPHQL_URL, headers=headers, content=orjson.dumps(payload))
+    if response.status_code == 401:
+        _revoke_github_token(token)
+        return None
+    if _is_rate_limited(response):
+        _evict_rate_limited_token(token, response.headers)
+        return None
+    response.raise_for_status()
+
+    body = orjson.loads(response.content)
+    if _is_rate_limited(response, body):
+        _evict_rate_limited_token(token, response.headers)
+        return None
+    # Still evict a token whose budget this call used up, so the next request skips it.
+    _record_rate_limit(token, response.headers)
+    owner = (body.get("data") or {}).get("repositoryOwner")
+    if owner is None:
+        errors = body.get("errors") or [{"message": f"Could not resolve to a user or organisation with the login of '{username}'."}]
+        raise LookupError("; ".join(error.get("message", "") for error in errors))
+
+    repos = owner["repositories"]["nodes"]
+    for repo in repos:
+        repo["language"] = (repo.pop("primaryLanguage") or {}).get("name")
+        repo["description"] = (repo.get("description") or "")[:MAX_DESCRIPTION_CHARS]
+    return repos
+
+async def _fetch_repos_rest(username: str, cached) -> tuple:
+    """Fetches repos over REST, revalidating a cached entry with If-None-Match. Returns (etag, repos)."""
     api_url = f"https://api.github.com/users/{username}/repos?per_page=10" 
     headers = {
         "Accept": "application/vnd.github.v3+json",
         "X-GitHub-Api-Version": "2022-11-28"
     }
+    if cached is not None and cached[0]:
+        headers["If-None-Match"] = cached[0]
+
+    response = await _send("GET", api_url, headers=headers)
+    if response.status_code == 304:
+        with _CACHE_LOCK:
+            _CACHE_STATS["github_not_modified"] += 1
+        return cached[0], cached[1]
+
+    response.raise_for_status() 
+    
+    repos = orjson.loads(response.content)
+    simplified_repos = [
+        {
+            "name": repo.get("name"),
+            "stars": repo.get("stargazers_count"),
+            "forks": repo.get("forks_count"),
+            "language": repo.get("language"),
+            "description": (repo.get("description") or "")[:MAX_DESCRIPTION_CHARS],
+            "is_fork": repo.get("fork")
+        } for repo in repos
+    ]
+    return response.headers.get("ETag"), simplified_repos
+
+def _is_github_cache_fresh(username: str) -> bool:
+    with _CACHE_LOCK:
+        cached = _GH_CACHE.get(username.lower())
+        return cached is not None and time.monotonic() - cached[2] < _GH_FRESH_SECONDS
+
+async def get_github_data(username: str) -> dict:
+    """Fetches public repository data for a given GitHub username (limited to 10 for speed)."""
+    cache_key = username.lower()
+    with _CACHE_LOCK:
+        cached = _GH_CACHE.get(cache_key)
+        if cached is not None and time.monotonic() - cached[2] < _GH_FRESH_SECONDS:
+            _CACHE_STATS["github_hits"] += 1
+            return cached[1]
+        _CACHE_STATS["github_misses"] += 1
+
     try:
-        response = requests.get(api_url, headers=headers)
-        response.raise_for_status() 
-        
-        repos = response.json()
-        simplified_repos = [
-            {
-                "name": repo.get("name"),
-                "stars": repo.get("stargazers_count"),
-                "forks": repo.get("forks_count"),
-                "language": repo.get("language"),
-                "description": repo.get("description"),
-                "is_fork": repo.get("fork")
-            } for repo in repos
-        ]
+        # Rejected and rate-limited tokens are evicted and the next one tried; with every token rejected or
+        # exhausted we fall back to the anonymous REST budget.
+        etag, simplified_repos = None, None
+        token = _acquire_github_token()
+        while token and simplified_repos is None:
+            simplified_repos = await _fetch_repos_graphql(username, token)
+            if simplified_repos is None:
+                token = _acquire_github_token()
+        if simplified_repos is None:
+            etag, simplified_repos = await _fetch_repos_rest(username, cached)
+
+        with _CACHE_LOCK:
+            _GH_CACHE[cache_key] = (etag, simplified_repos, time.monotonic())
         return simplified_repos
 
-    except requests.exceptions.RequestException as e:
+    except (httpx.HTTPError, LookupError) as e:
         print(f"Error fetching Github data: {e}")
         return {"error": f"Could not fetch GitHub data for '{username}'.", "details": str(e)}
 
-def get_gemini_analysis(username: str, github_data: dict) -> str:
+def _analysis_cache_key(username: str, github_data: dict) -> str:
+    return sha256(orjson.dumps({"u": username, "d": github_data}, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+def _get_cached_analysis(cache_key: str):
+    with _CACHE_LOCK:
+        cached = _LLM_CACHE.get(cache_key)
+        if cached is not None:
+            _CACHE_STATS["llm_hits"] += 1
+        else:
+            _CACHE_STATS["llm_misses"] += 1
+        return cached
+
+def _store_analysis(cache_key: str, github_data: dict, analysis_text: str) -> None:
+    """Caches successful analyses of real repo lists only."""
+    if analysis_text.startswith("Error:") or not isinstance(github_data, list):
+        return
+    with _CACHE_LOCK:
+        _LLM_CACHE[cache_key] = analysis_text
+
+def build_analysis_prompt(username: str, github_data: dict) -> str:
+    github_data_json_string = orjson.dumps(github_data).decode()
+    return "".join((_PROMPT_PREFIX, github_data_json_string, username.join(_PROMPT_USERNAME_SEGMENTS)))
+
+async def get_gemini_analysis(username: str, github_data: dict) -> str:
     """Performs the final analysis based on GitHub data."""
-    github_data_json_string = json.dumps(github_data, indent=2)
-    prompt_text = GEMINI_PROMPT_TEMPLATE.format(
-        github_data=github_data_json_string,
-        username=username
-    )
-    analysis_text = gemini_call(prompt_text)
+    cache_key = _analysis_cache_key(username, github_data)
+    cached = _get_cached_analysis(cache_key)
+    if cached is not None:
+        return cached
+
+    analysis_text = await gemini_call(build_analysis_prompt(username, github_data))
     
+    _store_analysis(cache_key, github_data, analysis_text)
     return analysis_text
 
+async def stream_gemini_analysis(username: str, github_data: dict):
+    """Streaming variant of get_gemini_analysis; yields the analysis as Gemini produces it."""
+    cache_key = _analysis_cache_key(username, github_data)
+    cached = _get_cached_analysis(cache_key)
+    if cached is not None:
+        yield cached
+        return
+
+    chunks = []
+    async for chunk in gemini_stream(build_analysis_prompt(username, github_data)):
+        chunks.append(chunk)
+        yield chunk
+
+    if not any(chunk.startswith("Error:") for chunk in chunks):
+        _store_analysis(cache_key, github_data, "".join(chunks).strip())
+
+
+def orjson_response(payload, status: int = 200) -> HttpResponse:
+    """Serializes once with orjson instead of JsonResponse's json.dumps(cls=DjangoJSONEncoder) walk.
+
+    Already-encoded bodies (bytes, e.g. a rendered envelope) are sent as-is.
+    """
+    body = payload if isinstance(payload, bytes) else orjson.dumps(payload)
+    return HttpResponse(body, content_type="application/json", status=status)
+
+# Fixed-shape A2A envelopes, split on their {FIELD} placeholders once at import. Rendering is a join of
+# the static byte segments with the orjson-encoded per-request values; no envelope dicts are built.
+_PLACEHOLDER_RE = re.compile(rb'\{([A-Z_]+)\}')
+
+def _compile_envelope(template: bytes) -> tuple:
+    segments = _PLACEHOLDER_RE.split(template)
+    return segments[0::2], [name.decode() for name in segments[1::2]]
+
+def _render_envelope(envelope: tuple, values: dict) -> bytes:
+    literals, names = envelope
+    out = [literals[0]]
+    for name, literal in zip(names, literals[1:]):
+        out.append(orjson.dumps(values[name]))
+        out.append(literal)
+    return b"".join(out)
+
+_TASK_ENVELOPE = _compile_envelope(
+    b'{"jsonrpc":"2.0","id":{RPC_ID},"result":{'
+    b'"id":{TASK_ID},"contextId":{CTX_ID},'
+    b'"status":{"state":"completed","timestamp":{TS},"message":{'
+    b'"kind":"message","role":"agent","parts":[{"kind":"text","text":{ANALYSIS}}],'
+    b'"messageId":{MSG_ID},"taskId":{TASK_ID}}},'
+    b'"artifacts":[{"artifactId":{ART_ID},"name":"github_raw_data","parts":[{"kind":"data","data":{GH_DATA}}]}],'
+    b'"history":[],"kind":"task"}}'
+)
+_STATUS_UPDATE_ENVELOPE = _compile_envelope(
+    b'{"jsonrpc":"2.0","id":{RPC_ID},"result":{'
+    b'"taskId":{TASK_ID},"contextId":{CTX_ID},"kind":"status-update",'
+    b'"status":{"state":"working","timestamp":{TS},"message":{'
+    b'"kind":"message","role":"agent","parts":[{"kind":"text","text":{ANALYSIS}}],'
+    b'"messageId":{MSG_ID},"taskId":{TASK_ID}}},'
+    b'"final":false}}'
+)
+
+def render_task_response(rpc_id, task_id: str, context_id: str, analysis_text: str, github_data: dict,
+                         message_id: str, timestamp: str) -> bytes:
+    """Renders a finished analysis as the completed A2A task / JSON-RPC envelope."""
+    return _render_envelope(_TASK_ENVELOPE, {
+        "RPC_ID": rpc_id, "TASK_ID": task_id, "CTX_ID": context_id, "TS": timestamp,
+        "ANALYSIS": analysis_text, "MSG_ID": message_id, "ART_ID": uuid.uuid4().hex, "GH_DATA": github_data
+    })
+
+def render_status_update(rpc_id, task_id: str, context_id: str, text: str, message_id: str, timestamp: str) -> bytes:
+    """Renders one streamed chunk of analysis as a 'working' A2A status-update event."""
+    return _render_envelope(_STATUS_UPDATE_ENVELOPE, {
+        "RPC_ID": rpc_id, "TASK_ID": task_id, "CTX_ID": context_id, "TS": timestamp,
+        "ANALYSIS": text, "MSG_ID": message_id
+    })
+
+async def stream_task_frames(rpc_id, task_id: str, context_id: str, github_data: dict, analysis_chunks, message_id: str,
+                             analysis_text: str = ""):
+    """Yields NDJSON frames: one status-update per analysis chunk, then the completed task.
+
+    With analysis_chunks=None (errors, greetings) only the completed task carrying analysis_text is sent.
+    Every frame carries the same messageId (they are pieces of one agent message) but its own timestamp.
+    """
+    chunks = []
+    try:
+        if analysis_chunks is not None:
+            async for chunk in analysis_chunks:
+                chunks.append(chunk)
+                frame = render_status_update(rpc_id, task_id, context_id, chunk, message_id, datetime.now(timezone.utc).isoformat())
+                yield frame + b"\n"
+            analysis_text = "".join(chunks).strip()
+    except Exception as e:
+        print(f"---! CRITICAL ERROR while streaming DevAnalystView !---: {e}")
+        analysis_text = f"I'm sorry, I ran into a critical server error. Please tell the admin: {str(e)}"
+    frame = render_task_response(rpc_id, task_id, context_id, analysis_text, github_data, message_id, datetime.now(timezone.utc).isoformat())
+    yield frame + b"\n"
+
+async def _single_frame(body: bytes):
+    yield body + b"\n"
+
+def ndjson_response(frames) -> StreamingHttpResponse:
+    """Streams NDJSON frames. Only ASGI delivers them as produced; under WSGI Django buffers the async iterator."""
+    return StreamingHttpResponse(frames, content_type="application/x-ndjson", status=200)
+
 
 
 @method_decorator(csrf_exempt, name='dispatch')
 class DevAnalystView(View):
 
-    def post(self, request: HttpRequest, *args, **kwargs):
+    async def post(self, request: HttpRequest, *args, **kwargs):
+        now_iso = datetime.now(timezone.utc).isoformat()
+        message_id = uuid.uuid4().hex
         rpc_id = None
+        params = {}
+        message = {}
+        stream = False
 
         try:
-            data = json.loads(request.body)
-            rpc_id = data.get('id', str(uuid.uuid4()))
+            data = orjson.loads(request.body)
+            rpc_id = data.get('id')
+            stream = data.get('method') == 'message/stream'
             params = data.get('params', {})
             message = params.get('message', {})
             parts = message.get('parts', [])
-
-            full_raw_input = ""
-            for part in parts:
-                if part.get('kind') == 'text' and part.get('text'):
-                    full_raw_input = part['text'].strip()
-            
-            clean_username = extract_username_from_input(full_raw_input)
+            analysis_chunks = None
+
+            full_raw_input = next(
+                (part['text'] for part in parts if part.get('kind') == 'text' and part.get('text')), ""
+            )[:MAX_INPUT_CHARS]
+
+            # Bare logins and greetings are answered without a Gemini round-trip.
+            match = _USERNAME_RE.match(full_raw_input)
+            # Without the extraction call nothing has touched the Gemini host yet.
+            warm_gemini = bool(match and GEMINI_API_URL)
+            if match:
+                clean_username = match.group('u').lower()
+            else:
+                full_raw_input = _MENTION_PREFIX_RE.sub("", full_raw_input.strip(), count=1)
+                if not full_raw_input:
+                    clean_username = ""
+                else:
+                    # Warm the GitHub connection while Gemini extracts the username; a cache hit has no
+                    # round-trip to overlap.
+                    if not _is_extraction_cached(full_raw_input):
+                        _start_warm_up(GITHUB_WARMUP_URL)
+                    clean_username = normalize_username(await extract_username_from_input(full_raw_input))
             
             if clean_username.startswith("error:") or clean_username == "none" or not clean_username:
-                analysis_text = "**Error:** Invalid request. Please provide a single, clean GitHub username."
+                analysis_text = INVALID_USERNAME_TEXT
                 if clean_username.startswith("error:"):
                      analysis_text += f"\n(Internal detail: {clean_username})"
                 github_data = {} 
@@ -160,50 +696,69 @@ class DevAnalystView(View):
             elif clean_username in ["help", "hi", ""]:
                 analysis_text = ""
                 github_data = {} 
+            elif not _GITHUB_LOGIN_RE.fullmatch(clean_username):
+                analysis_text = INVALID_USERNAME_TEXT
+                github_data = {}
             else:
-                github_data = get_github_data(clean_username)
-                analysis_text = get_gemini_analysis(clean_username, github_data)
+                if warm_gemini and not _is_github_cache_fresh(clean_username):
+                    # Open the Gemini connection while GitHub is in flight; a fresh cache hit has no
+                    # round-trip to overlap.
+                    _start_warm_up(GEMINI_WARMUP_URL)
+                github_data = await get_github_data(clean_username)
+                if stream:
+                    analysis_text = ""
+                    analysis_chunks = stream_gemini_analysis(clean_username, github_data)
+                else:
+                    analysis_text = await get_gemini_analysis(clean_username, github_data)
 
 
-            task_id = message.get('taskId', str(uuid.uuid4()))
-            context_id = params.get('contextId', task_id)
-            agent_message_part = { "kind": "text", "text": analysis_text }
-            response_message = {
-                "kind": "message", "role": "agent", "parts": [agent_message_part],
-                "messageId": str(uuid.uuid4()), "taskId": task_id
-            }
-            result_payload = {
-                "id": task_id, "contextId": context_id, 
-                "status": {"state": "completed", "timestamp": datetime.now(timezone.utc).isoformat(), "message": response_message},
-                "artifacts": [{"artifactId": str(uuid.uuid4()), "name": "github_raw_data", "parts": [{"kind": "data", "data": github_data}]}],
-                "history": [], "kind": "task"
-            }
-            response = {"jsonrpc": "2.0", "id": rpc_id, "result": result_payload}
+            task_id = message.get('taskId') or uuid.uuid4().hex
+            context_id = params.get('contextId') or task_id
+            if rpc_id is None:
+                rpc_id = task_id
 
-            return JsonResponse(response, status=200)
+            # message/stream callers always get NDJSON, even when there is nothing to stream.
+            if stream:
+                return ndjson_response(
+                    stream_task_frames(rpc_id, task_id, context_id, github_data, analysis_chunks, message_id, analysis_text)
+                )
+
+            body = render_task_response(rpc_id, task_id, context_id, analysis_text, github_data, message_id, now_iso)
+
+            return orjson_response(body, status=200)
 
         except Exception as e:
             print(f"---! CRITICAL ERROR in DevAnalystView !---: {e}")
 
             error_text = f"I'm sorry, I ran into a critical server error. Please tell the admin: {str(e)}"
 
-            task_id = str(uuid.uuid4())
-            context_id = str(uuid.uuid4())
-            if 'message' in locals() and message:
-                 task_id = message.get('taskId', str(uuid.uuid4()))
-            if 'params' in locals() and params:
-                context_id = params.get('contextId', task_id)
+            task_id = (message.get('taskId') if isinstance(message, dict) else None) or uuid.uuid4().hex
+            context_id = (params.get('contextId') if isinstance(params, dict) else None) or task_id
             
             agent_message_part = { "kind": "text", "text": error_text }
             response_message = {
                 "kind": "message", "role": "agent", "parts": [agent_message_part],
-                "messageId": str(uuid.uuid4()), "taskId": task_id
+                "messageId": message_id, "taskId": task_id
             }
             result_payload = {
                 "id": task_id, "contextId": context_id,
-                "status": {"state": "completed", "timestamp": datetime.now(timezone.utc).isoformat(), "message": response_message},
+                "status": {"state": "completed", "timestamp": now_iso, "message": response_message},
                 "artifacts": [], "history": [], "kind": "task"
             }
-            response = {"jsonrpc": "2.0", "id": rpc_id or str(uuid.uuid4()), "result": result_payload}
+            response = {"jsonrpc": "2.0", "id": rpc_id if rpc_id is not None else task_id, "result": result_payload}
             
-            return JsonResponse(response, status=200)
\ No newline at end of file
+            if stream:
+                return ndjson_response(_single_frame(orjson.dumps(response)))
+            return orjson_response(response, status=200)
+
+
+class MetricsView(View):
+    """Exposes the in-process cache hit/miss counters for this worker."""
+
+    def get(self, request: HttpRequest, *args, **kwargs):
+        with _CACHE_LOCK:
+            stats = dict(_CACHE_STATS)
+            stats["extract_cache_size"] = len(_EXTRACT_CACHE)
+            stats["github_cache_size"] = len(_GH_CACHE)
+            stats["llm_cache_size"] = len(_LLM_CACHE)
+        return orjson_response(stats, status=200)
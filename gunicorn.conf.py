@@ -0,0 +1,17 @@
+"""
+Gunicorn config for dev_analyst.
+
+Serves the ASGI application on uvicorn workers so the async DevAnalystView can
+hold many in-flight GitHub/Gemini calls per worker. Run with: ``gunicorn``
+"""
+
+import os
+
+wsgi_app = 'dev_analyst.asgi:application'
+worker_class = 'uvicorn_worker.UvicornWorker'
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# UvicornWorker passes this through as uvicorn's --timeout-keep-alive, keeping
+# A2A clients' connections warm across back-and-forth requests.
+keepalive = 60